@@ -0,0 +1,178 @@
+# Copyright (c) BDist Development Team
+# Distributed under the terms of the Modified BSD License.
+"""Local article category classifier: TF-IDF features and nearest-centroid in numpy.
+
+Models are trained from the stored (article_category, cleaned_text) pairs with
+`flask train-classifier` and saved as versioned `category-<version>.npz` files;
+the newest file in the model directory is the one served.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+from typing import NamedTuple
+
+import numpy as np
+
+from extractive import tokenize
+
+
+class Prediction(NamedTuple):
+    label: str
+    confidence: float
+
+
+class CategoryClassifier:
+    """Nearest-centroid classifier over sublinear TF-IDF vectors.
+
+    The confidence of a prediction is the softmax probability of the nearest centroid,
+    with cosine similarities scaled by 1 / `temperature`.
+    """
+
+    def __init__(self, vocabulary, idf, centroids, labels, version, temperature=0.05):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.centroids = centroids
+        self.labels = labels
+        self.version = version
+        self.temperature = temperature
+
+    @classmethod
+    def train(cls, texts, labels, max_features=20000, min_df=2, temperature=0.05):
+        """Fit a classifier on parallel lists of texts and labels."""
+        documents = [Counter(tokenize(text)) for text in texts]
+        document_frequency = Counter(word for document in documents for word in document)
+        words = [word for word, df in document_frequency.most_common(max_features) if df >= min_df]
+        vocabulary = {word: index for index, word in enumerate(words)}
+        df = np.array([document_frequency[word] for word in words], dtype=float)
+        idf = np.log((1 + len(documents)) / (1 + df)) + 1
+
+        label_names = sorted(set(labels))
+        label_index = {label: index for index, label in enumerate(label_names)}
+        centroids = np.zeros((len(label_names), len(words)))
+        model = cls(vocabulary, idf, centroids, label_names, version=None, temperature=temperature)
+        for document, label in zip(documents, labels):
+            indices, weights = model._vector(document)
+            centroids[label_index[label], indices] += weights
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        model.centroids = centroids / norms
+
+        digest = hashlib.sha1(model.centroids.tobytes()).hexdigest()[:8]
+        model.version = f"{time.strftime('%Y%m%d%H%M%S')}-{digest}"
+        return model
+
+    def _vector(self, counts):
+        """Sparse L2-normalised TF-IDF vector (indices, weights) of a word count."""
+        pairs = [(self.vocabulary[word], count) for word, count in counts.items() if word in self.vocabulary]
+        if not pairs:
+            return np.zeros(0, dtype=int), np.zeros(0)
+        indices = np.fromiter((index for index, _ in pairs), dtype=int, count=len(pairs))
+        counts = np.fromiter((count for _, count in pairs), dtype=float, count=len(pairs))
+        weights = (1 + np.log(counts)) * self.idf[indices]
+        return indices, weights / np.linalg.norm(weights)
+
+    def predict(self, text):
+        """Most likely label of a text and its confidence, or None if no known word occurs in it."""
+        indices, weights = self._vector(Counter(tokenize(text)))
+        if not len(indices):
+            return None
+        similarities = self.centroids[:, indices] @ weights
+        scaled = np.exp((similarities - similarities.max()) / self.temperature)
+        best = int(np.argmax(similarities))
+        return Prediction(self.labels[best], float(scaled[best] / scaled.sum()))
+
+    def save(self, directory):
+        """Write the model to `directory`/category-<version>.npz and return the path."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"category-{self.version}.npz")
+        words = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez_compressed(
+            path,
+            words=np.array(words),
+            idf=self.idf,
+            centroids=self.centroids,
+            labels=np.array(self.labels),
+            version=np.array(self.version),
+            temperature=np.array(self.temperature),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            words = data["words"].tolist()
+            return cls(
+                {word: index for index, word in enumerate(words)},
+                data["idf"],
+                data["centroids"],
+                data["labels"].tolist(),
+                str(data["version"]),
+                float(data["temperature"]),
+            )
+
+
+class ClassifierStore:
+    """Serves the newest model in a directory, picking up retrained models without a restart."""
+
+    def __init__(self, directory, check_interval=60):
+        self.directory = directory
+        self.check_interval = check_interval
+        self.model = None
+        self.path = None
+        self.checked = float("-inf")  # check on first use, however early after boot
+        self.lock = threading.Lock()
+
+    def latest_path(self):
+        try:
+            names = sorted(name for name in os.listdir(self.directory)
+                           if name.startswith("category-") and name.endswith(".npz"))
+        except FileNotFoundError:
+            return None
+        return os.path.join(self.directory, names[-1]) if names else None
+
+    def get(self):
+        """The current model, or None if none has been trained yet."""
+        now = time.monotonic()
+        if now - self.checked >= self.check_interval:
+            with self.lock:
+                self.checked = now
+                path = self.latest_path()
+                if path and path != self.path:
+                    self.model, self.path = CategoryClassifier.load(path), path
+        return self.model
+
+
+class ClassifierMetrics:
+    """Thread-safe per-process counters of which path answered and how often local and LLM agree."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.paths = Counter()
+        self.comparisons = Counter()
+        self.agreements = Counter()
+
+    def record_path(self, path):
+        with self.lock:
+            self.paths[path] += 1
+
+    def record_comparison(self, kind, local_label, llm_label):
+        """Record whether the local prediction matched the LLM's answer. `kind` is 'fallback' or 'shadow'."""
+        with self.lock:
+            self.comparisons[kind] += 1
+            self.agreements[kind] += local_label == llm_label
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "paths": dict(self.paths),
+                "agreement": {
+                    kind: {
+                        "compared": self.comparisons[kind],
+                        "agreed": self.agreements[kind],
+                        "rate": self.agreements[kind] / self.comparisons[kind],
+                    }
+                    for kind in self.comparisons
+                },
+            }
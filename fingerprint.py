@@ -0,0 +1,65 @@
+# Copyright (c) BDist Development Team
+# Distributed under the terms of the Modified BSD License.
+"""MinHash fingerprints of article text with LSH banding, for near-duplicate lookup.
+
+A signature is the minimum of NUM_PERM random hash permutations over the text's
+word shingles; the share of equal positions in two signatures estimates the
+Jaccard similarity of their shingle sets. Signatures are cut into BANDS bands
+of ROWS values, and articles sharing any band bucket are candidate duplicates,
+so a lookup only compares against a handful of articles.
+"""
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+# Smallest prime above 2**32, so the permutations are bijections of 32-bit shingle hashes.
+PRIME = np.uint64(4294967311)
+
+_random = np.random.RandomState(20240601)
+_A = _random.randint(1, 2 ** 31, size=NUM_PERM).astype(np.uint64)
+_B = _random.randint(0, 2 ** 31, size=NUM_PERM).astype(np.uint64)
+
+WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def shingle_hashes(text):
+    """32-bit hashes of the distinct word SHINGLE_SIZE-grams of a text."""
+    words = WORD.findall(text.lower())
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 0))}
+    return np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def signature(text):
+    """MinHash signature (NUM_PERM uint64 values) of a text, or None if it is too short to shingle."""
+    hashes = shingle_hashes(text)
+    if not len(hashes):
+        return None
+    # (a * x + b) mod p stays below 2**64: a < 2**31, x < 2**32 and b < 2**31.
+    return ((np.outer(_A, hashes) + _B[:, None]) % PRIME).min(axis=1)
+
+
+def band_buckets(sig):
+    """One signed 64-bit bucket id per band of a signature."""
+    return [
+        int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8).digest(), "big", signed=True)
+        for band in sig.reshape(BANDS, ROWS)
+    ]
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+
+def to_bytes(sig):
+    return sig.astype("<u8").tobytes()
+
+
+def from_bytes(data):
+    return np.frombuffer(data, dtype="<u8").astype(np.uint64)
@@ -0,0 +1,302 @@
+# Copyright (c) BDist Development Team
+# Distributed under the terms of the Modified BSD License.
+"""Gateway in front of the OpenAI chat completions API.
+
+Every LLM call of the API goes through an LLMGateway, which
+- rate limits requests and tokens per model with token buckets,
+- caps the number of calls in flight with a semaphore,
+- fails fast with LLMOverloaded when too many calls are already waiting,
+- applies a per-call timeout, and
+- retries 429s, 5xxs, timeouts and connection errors with exponential backoff
+  and full jitter, honoring the provider's Retry-After header.
+
+Limits are per process: with gunicorn, divide the provider quota by WEB_CONCURRENCY.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+import openai
+
+
+class LLMOverloaded(Exception):
+    """The call was rejected before reaching the provider, or the provider kept rate limiting it."""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """A thread-safe token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount, max_wait):
+        """Reserve `amount` tokens and return how long the caller must wait before using them.
+
+        Tokens are taken up front (the balance may go negative) so concurrent callers queue
+        up fairly. Raises LLMOverloaded, without reserving anything, if the wait would exceed `max_wait`.
+        """
+        amount = min(amount, self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, (amount - self.tokens) / self.rate)
+            if wait > max_wait:
+                raise LLMOverloaded("LLM rate limit reached", retry_after=wait)
+            self.tokens -= amount
+            return wait
+
+    def refund(self, amount):
+        """Give back tokens reserved for a call that was not made."""
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def pause(self, seconds):
+        """Drain the bucket so that nothing is granted for `seconds` (used after a provider 429)."""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+def estimate_tokens(messages, max_tokens):
+    """Rough token cost of a call: ~4 characters per prompt token plus the completion budget."""
+    chars = 0
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content)
+        chars += len(content)
+    return chars // 4 + (max_tokens or 0)
+
+
+def retry_after_seconds(error):
+    """Read the Retry-After (or retry-after-ms) header of a failed call, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+)
+
+
+class LLMGateway:
+    """Rate-limited, concurrency-capped access to `client.chat.completions.create`."""
+
+    def __init__(
+        self,
+        client,
+        requests_per_minute=500,
+        tokens_per_minute=200000,
+        max_concurrency=8,
+        max_queue=32,
+        timeout=30.0,
+        max_retries=3,
+        max_wait=10.0,
+        backoff_base=0.5,
+        backoff_cap=20.0,
+        model_limits=None,
+    ):
+        self.client = client
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.model_limits = model_limits or {}
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.lock = threading.Lock()
+        self.waiting = 0
+        self.buckets = {}
+
+    @classmethod
+    def from_env(cls, client):
+        """Build a gateway configured from the LLM_* environment variables."""
+        return cls(
+            client,
+            requests_per_minute=int(os.environ.get("LLM_REQUESTS_PER_MINUTE", 500)),
+            tokens_per_minute=int(os.environ.get("LLM_TOKENS_PER_MINUTE", 200000)),
+            max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", 8)),
+            max_queue=int(os.environ.get("LLM_MAX_QUEUE", 32)),
+            timeout=float(os.environ.get("LLM_TIMEOUT", 30)),
+            max_retries=int(os.environ.get("LLM_MAX_RETRIES", 3)),
+            max_wait=float(os.environ.get("LLM_MAX_WAIT", 10)),
+        )
+
+    def _buckets_for(self, model):
+        with self.lock:
+            if model not in self.buckets:
+                requests_per_minute, tokens_per_minute = self.model_limits.get(
+                    model, (self.requests_per_minute, self.tokens_per_minute)
+                )
+                self.buckets[model] = (TokenBucket(requests_per_minute), TokenBucket(tokens_per_minute))
+            return self.buckets[model]
+
+    def _backoff(self, attempt, retry_after):
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.backoff_base)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _enter(self):
+        """Take a concurrency slot, failing fast when the queue is too deep."""
+        with self.lock:
+            if self.waiting >= self.max_queue:
+                raise LLMOverloaded("Too many LLM requests queued")
+            self.waiting += 1
+        try:
+            if not self.semaphore.acquire(timeout=self.max_wait):
+                raise LLMOverloaded("Timed out waiting for an LLM slot")
+        finally:
+            with self.lock:
+                self.waiting -= 1
+
+    def _throttle(self, model, messages, max_tokens, max_wait):
+        request_bucket, token_bucket = self._buckets_for(model)
+        wait = request_bucket.reserve(1, max_wait)
+        try:
+            wait = max(wait, token_bucket.reserve(estimate_tokens(messages, max_tokens), max_wait))
+        except LLMOverloaded:
+            request_bucket.refund(1)
+            raise
+        if wait:
+            time.sleep(wait)
+        return request_bucket
+
+    def _call(self, model, messages, max_tokens=None, **kwargs):
+        """Throttle and send one request, retrying transient failures. Must hold a slot.
+
+        All waits of a call (rate limiter and backoff) share one max_wait budget, so the slot is
+        never held sleeping for longer: a Retry-After beyond what is left fails fast instead.
+        """
+        deadline = time.monotonic() + self.max_wait
+        attempt = 0
+        while True:
+            request_bucket = self._throttle(model, messages, max_tokens, max(0.0, deadline - time.monotonic()))
+            try:
+                return self.client.with_options(timeout=self.timeout, max_retries=0).chat.completions.create(
+                    model=model, messages=messages, max_tokens=max_tokens, **kwargs
+                )
+            except RETRYABLE_ERRORS as e:
+                retry_after = retry_after_seconds(e)
+                delay = self._backoff(attempt, retry_after)
+                if isinstance(e, openai.RateLimitError):
+                    # Holds back the other callers too; they fail fast in _throttle if it is too long
+                    request_bucket.pause(delay)
+                if attempt >= self.max_retries or delay > deadline - time.monotonic():
+                    if isinstance(e, openai.RateLimitError) or retry_after is not None:
+                        raise LLMOverloaded("LLM provider is rate limiting requests", retry_after=delay) from e
+                    raise
+                attempt += 1
+                time.sleep(delay)
+
+    def chat(self, model, messages, max_tokens=None, **kwargs):
+        """Drop-in replacement for `client.chat.completions.create(model=..., messages=..., ...)`."""
+        self._enter()
+        try:
+            return self._call(model, messages, max_tokens, **kwargs)
+        finally:
+            self.semaphore.release()
+
+    def stream_chat(self, model, messages, max_tokens=None, **kwargs):
+        """Like chat() with stream=True, yielding the completion text piece by piece.
+
+        Failures are only retried until the stream is open, and the concurrency slot is
+        held until the stream is exhausted or closed. Nothing happens until iteration starts.
+        """
+        self._enter()
+        try:
+            stream = self._call(model, messages, max_tokens, stream=True, **kwargs)
+            try:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                stream.close()
+        finally:
+            self.semaphore.release()
+
+
+class ResponseCache:
+    """A thread-safe LRU cache of completion texts keyed by the request parameters, with a TTL."""
+
+    def __init__(self, max_entries=1024, ttl=86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Build a cache configured from LLM_CACHE_SIZE and LLM_CACHE_TTL (seconds)."""
+        return cls(
+            max_entries=int(os.environ.get("LLM_CACHE_SIZE", 1024)),
+            ttl=float(os.environ.get("LLM_CACHE_TTL", 86400)),
+        )
+
+    @staticmethod
+    def key(params):
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def get(self, params):
+        """Return the cached text for these request parameters, or None."""
+        key = self.key(params)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, text = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return text
+
+    def set(self, params, text):
+        """Cache the text produced for these request parameters."""
+        key = self.key(params)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, text)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
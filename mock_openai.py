@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+# Copyright (c) BDist Development Team
+# Distributed under the terms of the Modified BSD License.
+"""Local stand-in for the OpenAI chat completions API, for exercising the LLM gateway.
+
+Run it with `flask --app mock_openai run --port 8081` and start the API with
+OPENAI_BASE_URL=http://localhost:8081/v1. MOCK_429_RATE is the fraction of requests
+answered with 429 and a Retry-After of MOCK_RETRY_AFTER seconds; MOCK_LATENCY
+is the time (in seconds) taken by every successful completion.
+"""
+import json
+import os
+import random
+import time
+
+from flask import Flask, Response, jsonify, request
+
+MOCK_429_RATE = float(os.environ.get("MOCK_429_RATE", 0.5))
+MOCK_RETRY_AFTER = os.environ.get("MOCK_RETRY_AFTER", "1")
+MOCK_LATENCY = float(os.environ.get("MOCK_LATENCY", 0.2))
+
+app = Flask(__name__)
+stats = {"requests": 0, "rate_limited": 0}
+
+
+@app.route("/v1/chat/completions", methods=["POST"])
+def chat_completions():
+    """Answer with a canned completion, or a 429 for a random MOCK_429_RATE share of requests."""
+    stats["requests"] += 1
+    if random.random() < MOCK_429_RATE:
+        stats["rate_limited"] += 1
+        error = {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+        return jsonify(error), 429, {"Retry-After": MOCK_RETRY_AFTER}
+
+    data = request.get_json()
+    if data.get("stream"):
+        return Response(stream_completion(data), mimetype="text/event-stream")
+
+    time.sleep(MOCK_LATENCY)
+    return jsonify({
+        "id": f"chatcmpl-mock-{stats['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": data.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "Resposta simulada."},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13},
+    })
+
+
+def stream_completion(data):
+    """Yield a canned completion as OpenAI streaming chunks, spread over MOCK_LATENCY."""
+    words = "Resposta simulada enviada palavra a palavra.".split()
+    for index, word in enumerate(words):
+        time.sleep(MOCK_LATENCY / len(words))
+        chunk = {
+            "id": f"chatcmpl-mock-{stats['requests']}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": data.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "delta": {"content": word if index == 0 else " " + word},
+                "finish_reason": "stop" if index == len(words) - 1 else None,
+            }],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.route("/stats", methods=["GET"])
+def get_stats():
+    """Number of requests received and how many were rate limited."""
+    return jsonify(stats)
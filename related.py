@@ -0,0 +1,35 @@
+# Copyright (c) BDist Development Team
+# Distributed under the terms of the Modified BSD License.
+"""Similarity scores behind the precomputed related-articles index.
+
+An article is related to another by a blend of the Jaccard overlap of their
+keyword sets and the TF-IDF cosine similarity of their titles and summaries.
+IDF weights are taken over the candidate pool, which keeps scoring incremental.
+"""
+import numpy as np
+
+from extractive import tfidf_matrix, tokenize
+
+KEYWORD_WEIGHT = 0.5
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def score_candidates(keywords, text, candidates, keyword_weight=KEYWORD_WEIGHT):
+    """Score candidate articles against one article.
+
+    `keywords` is the article's set of keyword ids and `text` its title and summary;
+    `candidates` is a list of (article_id, keywords, text) tuples. Returns
+    (article_id, score) pairs, best first, leaving out candidates with a score of 0.
+    """
+    if not candidates:
+        return []
+    matrix, _ = tfidf_matrix([tokenize(text)] + [tokenize(candidate_text) for _, _, candidate_text in candidates])
+    cosines = matrix[1:] @ matrix[0]
+    scores = [
+        (article_id, keyword_weight * jaccard(keywords, candidate_keywords) + (1 - keyword_weight) * float(cosine))
+        for (article_id, candidate_keywords, _), cosine in zip(candidates, cosines)
+    ]
+    return sorted((pair for pair in scores if pair[1] > 0), key=lambda pair: pair[1], reverse=True)
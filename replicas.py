@@ -0,0 +1,152 @@
+# Copyright (c) BDist Development Team
+# Distributed under the terms of the Modified BSD License.
+"""Routing of database connections between the primary and read replicas.
+
+Read-only handlers get a connection to a random healthy replica; everything else,
+and any read when no replica is usable, goes to the primary. A replica is skipped
+- for `cooldown` seconds after a failed connection,
+- while its replication lag, checked at most every `lag_check_interval` seconds,
+  exceeds `max_lag` seconds, or is unknown because it is not streaming from the primary, and
+- for a read that must see a write (`min_lsn`) the replica has not replayed yet.
+"""
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+
+import psycopg
+
+# Seconds a standby is behind the primary, or NULL when that is unknown because no WAL
+# receiver is running (it lost the primary and may be serving stale data indefinitely).
+# Without pg_read_all_stats the receiver's status is hidden, so a running receiver counts
+# as streaming. A standby that has replayed everything it received is 0 behind, however
+# long ago the last transaction was (an idle primary does not make it stale).
+REPLICATION_LAG = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE COALESCE(status, 'streaming') = 'streaming') THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END;
+"""
+# Whether a standby has replayed the WAL up to a position (false on a server that is not a standby).
+REPLAYED = "SELECT COALESCE(pg_last_wal_replay_lsn() >= %s::pg_lsn, false);"
+LSN = re.compile(r"[0-9A-Fa-f]{1,8}/[0-9A-Fa-f]{1,8}")
+
+
+class Replica:
+    def __init__(self, url):
+        self.url = url
+        self.down_until = float("-inf")
+        self.lag = None
+        self.lag_checked = float("-inf")  # check on first use, however early after boot
+
+
+class ReplicaRouter:
+    """Hands out primary or replica connections. Health is tracked per process."""
+
+    def __init__(self, primary_url, replica_urls=(), max_lag=5.0, lag_check_interval=5.0, cooldown=30.0,
+                 connect_timeout=2):
+        self.primary_url = primary_url
+        self.replicas = [Replica(url) for url in replica_urls]
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.cooldown = cooldown
+        self.connect_timeout = connect_timeout
+        self.lock = threading.Lock()
+        self.routes = Counter()
+
+    @classmethod
+    def from_env(cls, primary_url):
+        urls = os.environ.get("DATABASE_REPLICA_URLS", "")
+        return cls(
+            primary_url,
+            [url.strip() for url in urls.split(",") if url.strip()],
+            max_lag=float(os.environ.get("REPLICA_MAX_LAG", 5)),
+            lag_check_interval=float(os.environ.get("REPLICA_LAG_CHECK_INTERVAL", 5)),
+            cooldown=float(os.environ.get("REPLICA_COOLDOWN", 30)),
+            connect_timeout=int(os.environ.get("REPLICA_CONNECT_TIMEOUT", 2)),
+        )
+
+    def connect(self, readonly=False, min_lsn=None):
+        """A connection to a usable replica if `readonly`, otherwise (or failing that) to the primary.
+
+        `min_lsn` is a primary WAL position (as returned by pg_current_wal_lsn()) the replica
+        must have replayed; malformed values are ignored.
+        """
+        if readonly:
+            if min_lsn is not None and not LSN.fullmatch(min_lsn):
+                min_lsn = None
+            now = time.monotonic()
+            with self.lock:
+                candidates = [replica for replica in self.replicas if self._usable(replica, now)]
+            random.shuffle(candidates)
+            for replica in candidates:
+                conn = self._connect_replica(replica, min_lsn)
+                if conn is not None:
+                    self._record("replica")
+                    return conn
+        self._record("fallback" if readonly and self.replicas else "primary")
+        return psycopg.connect(self.primary_url)
+
+    def _usable(self, replica, now):
+        """Whether a replica is worth connecting to: not in its cool-down, and not found lagging
+        by a check that is still current (it is only reconnected to for the next check)."""
+        if replica.down_until > now:
+            return False
+        lagging = replica.lag is not None and replica.lag > self.max_lag
+        return not (lagging and now - replica.lag_checked < self.lag_check_interval)
+
+    def _connect_replica(self, replica, min_lsn):
+        """Open a connection to `replica`, or return None (marking it if it is down or lagging)."""
+        try:
+            conn = psycopg.connect(replica.url, connect_timeout=self.connect_timeout)
+        except psycopg.OperationalError:
+            self._mark_down(replica)
+            return None
+
+        try:
+            now = time.monotonic()
+            if replica.lag is None or now - replica.lag_checked >= self.lag_check_interval:
+                lag = conn.execute(REPLICATION_LAG).fetchone()[0]
+                with self.lock:
+                    replica.lag = float(lag) if lag is not None else float("inf")
+                    replica.lag_checked = now
+            usable = replica.lag <= self.max_lag
+            if usable and min_lsn is not None:
+                usable = conn.execute(REPLAYED, (min_lsn,)).fetchone()[0]
+            conn.rollback()
+        except psycopg.Error:
+            conn.close()
+            self._mark_down(replica)
+            return None
+        if not usable:
+            conn.close()
+            return None
+        return conn
+
+    def _mark_down(self, replica):
+        with self.lock:
+            replica.down_until = time.monotonic() + self.cooldown
+
+    def _record(self, route):
+        with self.lock:
+            self.routes[route] += 1
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self.lock:
+            return {
+                "routes": dict(self.routes),
+                "replicas": [
+                    {
+                        "replica": index,
+                        "up": replica.down_until <= now,
+                        # None until checked, or while the replica is not streaming from the primary
+                        "lag": replica.lag if replica.lag != float("inf") else None,
+                    }
+                    for index, replica in enumerate(self.replicas)
+                ],
+            }
@@ -0,0 +1,19 @@
+-- Indexes backing the filtered, keyset-paginated GET /articles mode.
+
+-- Keyset pagination order: (published_date, id) descending.
+CREATE INDEX IF NOT EXISTS article_published_date_id_idx
+    ON article (published_date DESC, id DESC)
+    WHERE published_date IS NOT NULL;
+
+-- Filter lookups go from the filtered entity to its articles.
+CREATE INDEX IF NOT EXISTS article_source_source_id_article_id_idx
+    ON article_source (source_id, article_id);
+
+CREATE INDEX IF NOT EXISTS article_author_author_id_article_id_idx
+    ON article_author (author_id, article_id);
+
+CREATE INDEX IF NOT EXISTS article_keyword_keyword_id_article_id_idx
+    ON article_keyword (keyword_id, article_id);
+
+CREATE INDEX IF NOT EXISTS article_category_category_article_id_idx
+    ON article_category (category, article_id);
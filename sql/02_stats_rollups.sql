@@ -0,0 +1,36 @@
+-- Rollup tables behind GET /stats.
+-- They are updated incrementally by POST /articles and PUT /articles/<url>/increment,
+-- one row per (bucket, key), so dashboard queries scan buckets instead of articles.
+-- `flask compact-stats` folds old daily buckets into monthly ones (day = first day of the month).
+
+CREATE TABLE IF NOT EXISTS stats_daily (
+    day date PRIMARY KEY,
+    new_articles integer NOT NULL DEFAULT 0,
+    views integer NOT NULL DEFAULT 0,
+    saves integer NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS stats_keyword_daily (
+    day date NOT NULL,
+    keyword_id integer NOT NULL REFERENCES keyword (id) ON DELETE CASCADE,
+    articles integer NOT NULL DEFAULT 0,
+    views integer NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, keyword_id)
+);
+
+CREATE TABLE IF NOT EXISTS stats_source_daily (
+    day date NOT NULL,
+    source_id integer NOT NULL REFERENCES source (id) ON DELETE CASCADE,
+    articles integer NOT NULL DEFAULT 0,
+    views integer NOT NULL DEFAULT 0,
+    saves integer NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, source_id)
+);
+
+CREATE TABLE IF NOT EXISTS stats_category_daily (
+    day date NOT NULL,
+    category text NOT NULL,
+    articles integer NOT NULL DEFAULT 0,
+    views integer NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, category)
+);
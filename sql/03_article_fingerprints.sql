@@ -0,0 +1,17 @@
+-- MinHash fingerprints of article text and their LSH band buckets, for near-duplicate lookup
+-- (see fingerprint.py). Backfill existing articles with `flask index-fingerprints`.
+
+CREATE TABLE IF NOT EXISTS article_fingerprint (
+    article_id integer PRIMARY KEY REFERENCES article (id) ON DELETE CASCADE,
+    signature bytea NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS article_lsh_band (
+    band smallint NOT NULL,
+    bucket bigint NOT NULL,
+    article_id integer NOT NULL REFERENCES article (id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, article_id)
+);
+
+CREATE INDEX IF NOT EXISTS article_lsh_band_article_id_idx
+    ON article_lsh_band (article_id);
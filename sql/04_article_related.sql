@@ -0,0 +1,15 @@
+-- Precomputed related articles: the top RELATED_TOP_K neighbours of each article (see related.py).
+-- Maintained by POST /articles; rebuild from scratch with `flask rebuild-related`.
+
+CREATE TABLE IF NOT EXISTS article_related (
+    article_id integer NOT NULL REFERENCES article (id) ON DELETE CASCADE,
+    related_id integer NOT NULL REFERENCES article (id) ON DELETE CASCADE,
+    score real NOT NULL,
+    PRIMARY KEY (article_id, related_id)
+);
+
+CREATE INDEX IF NOT EXISTS article_related_article_id_score_idx
+    ON article_related (article_id, score DESC);
+
+CREATE INDEX IF NOT EXISTS article_related_related_id_idx
+    ON article_related (related_id);
@@ -0,0 +1,16 @@
+-- Indexes behind GET /autocomplete: trigram indexes for substring/fuzzy matches and
+-- pattern-ops btrees for the one- and two-character prefixes trigrams cannot serve.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS author_name_trgm_idx
+    ON author USING gin (lower(name) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS author_name_prefix_idx
+    ON author (lower(name) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS keyword_keyword_trgm_idx
+    ON keyword USING gin (lower(keyword) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS keyword_keyword_prefix_idx
+    ON keyword (lower(keyword) text_pattern_ops);
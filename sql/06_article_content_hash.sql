@@ -0,0 +1,7 @@
+-- Hash of the content an article was last saved with.
+-- POST /articles compares it with the incoming payload: when nothing changed, a repeat
+-- view only bumps times_viewed and the view stats instead of rewriting the analyses.
+-- Run `flask compact-article-children` once to remove the duplicated analysis rows
+-- older versions appended on every view; it also adds the unique indexes that keep them out.
+
+ALTER TABLE article ADD COLUMN IF NOT EXISTS content_hash text;
@@ -0,0 +1,20 @@
+-- Granularity of each stats bucket: 'day', or 'month' once `flask compact-stats` has folded
+-- a month's old daily buckets into the bucket dated the first of that month.
+-- GET /stats reports month buckets as months instead of as a spike on the 1st.
+
+ALTER TABLE stats_daily ADD COLUMN IF NOT EXISTS period text NOT NULL DEFAULT 'day' CHECK (period IN ('day', 'month'));
+ALTER TABLE stats_keyword_daily ADD COLUMN IF NOT EXISTS period text NOT NULL DEFAULT 'day' CHECK (period IN ('day', 'month'));
+ALTER TABLE stats_source_daily ADD COLUMN IF NOT EXISTS period text NOT NULL DEFAULT 'day' CHECK (period IN ('day', 'month'));
+ALTER TABLE stats_category_daily ADD COLUMN IF NOT EXISTS period text NOT NULL DEFAULT 'day' CHECK (period IN ('day', 'month'));
+
+-- Buckets compacted before this column existed: first-of-month buckets older than the
+-- default STATS_KEEP_DAYS (90). A month that only had its 1st left is labelled as a month
+-- too, which is what it covers by then.
+UPDATE stats_daily SET period = 'month'
+WHERE period = 'day' AND day = date_trunc('month', day)::date AND day < current_date - 90;
+UPDATE stats_keyword_daily SET period = 'month'
+WHERE period = 'day' AND day = date_trunc('month', day)::date AND day < current_date - 90;
+UPDATE stats_source_daily SET period = 'month'
+WHERE period = 'day' AND day = date_trunc('month', day)::date AND day < current_date - 90;
+UPDATE stats_category_daily SET period = 'month'
+WHERE period = 'day' AND day = date_trunc('month', day)::date AND day < current_date - 90;
@@ -1,4 +1,6 @@
 import requests
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = "http://localhost:8080" 
 
@@ -50,6 +52,17 @@ def test_summary():
     except requests.exceptions.RequestException as e:
         print(f"An error occurred: {e}")
 
+def test_llm_burst(n=50):
+    """Fire n concurrent /summarize calls and count the status codes.
+
+    Run the API against mock_openai.py to see 429s being retried and the gateway shedding load with 503s.
+    """
+    url = f"{BASE_URL}/summarize"
+    data = {"article_text": "This is a sample article text that will be summarized."}
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        statuses = list(pool.map(lambda _: requests.post(url, json=data).status_code, range(n)))
+    print(Counter(statuses))
+
 if __name__ == "__main__":
     test_summary()
     # Test get all articles